@@ -15,7 +15,7 @@ if [ ! -f "$ONNX_FILE" ] || [ ! -f "$DATA_FILE" ] || [ ! -f "$CONFIG_FILE" ]; th
     echo "This will take 2-3 minutes (downloading ~1.5 GB)..."
     echo ""
     
-    python faskapi/download_model.py
+    python -m faskapi.download_model
     
     if [ $? -eq 0 ]; then
         echo ""
@@ -42,6 +42,26 @@ else
     echo "  - config.json"
 fi
 
+# Make the model output label ids instead of logits (no-op once applied)
+if [ -f "$ONNX_FILE" ]; then
+    python -m faskapi.append_argmax || echo "⚠️  Could not append ArgMax. API will compute it from logits."
+fi
+
+# Quantize model to INT8 once (set USE_INT8=0 to serve the FP32 model)
+INT8_FILE="/app/models/ner_address_model_final.int8.onnx"
+if [ "${USE_INT8:-1}" = "1" ] && [ -f "$ONNX_FILE" ] && [ ! -f "$INT8_FILE" ]; then
+    echo ""
+    echo "Quantizing model to INT8..."
+    python -m faskapi.quantize_model || echo "⚠️  Quantization failed. API will use the FP32 model."
+fi
+
+# Build the optimized graph cache once, before the workers start
+if [ "${ORT_CACHE_OPTIMIZED_MODEL:-1}" = "1" ] && [ -f "$ONNX_FILE" ]; then
+    echo ""
+    echo "Building optimized model cache..."
+    python -m faskapi.ner_model || echo "⚠️  Could not build the optimized model cache. Workers will load the source model."
+fi
+
 echo ""
 echo "Starting FastAPI server..."
 echo "=========================================="
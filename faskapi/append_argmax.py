@@ -0,0 +1,66 @@
+"""
+Script to append an ArgMax node to the ONNX model so it outputs label ids
+"""
+import onnx
+from onnx import helper, TensorProto
+from . import config
+
+
+def append_argmax(model_path: str, output_path: str = None) -> bool:
+    """
+    Replace the logits output of an ONNX model with its ArgMax over labels
+    
+    The session then returns int64 [batch, sequence] label ids instead of
+    float [batch, sequence, num_labels] logits. External weight files are
+    not loaded or rewritten, so output_path must stay in the same directory.
+    
+    Args:
+        model_path: Path to the ONNX model
+        output_path: Path to save the model (defaults to overwriting model_path)
+        
+    Returns:
+        True if the model was rewritten, False if it already outputs label ids
+    """
+    output_path = output_path or model_path
+    model = onnx.load(model_path, load_external_data=False)
+    graph = model.graph
+    
+    if any(output.name == config.PRED_IDS_OUTPUT for output in graph.output):
+        print(f"{model_path} already outputs {config.PRED_IDS_OUTPUT}")
+        return False
+    
+    logits = graph.output[0]
+    dims = logits.type.tensor_type.shape.dim
+    
+    graph.node.append(helper.make_node(
+        "ArgMax",
+        inputs=[logits.name],
+        outputs=[config.PRED_IDS_OUTPUT],
+        name="LogitsArgMax",
+        axis=-1,
+        keepdims=0,
+    ))
+    pred_ids = helper.make_tensor_value_info(
+        config.PRED_IDS_OUTPUT,
+        TensorProto.INT64,
+        [dim.dim_param or dim.dim_value or None for dim in dims[:-1]],
+    )
+    del graph.output[:]
+    graph.output.append(pred_ids)
+    
+    onnx.save(model, output_path)
+    print(f"Appended ArgMax to {model_path} -> {output_path}")
+    return True
+
+
+def append_argmax_to_models():
+    """
+    Append ArgMax to the FP32 and INT8 models that are present
+    """
+    for model_file in (config.MODEL_FILE, config.INT8_MODEL_FILE):
+        if model_file.exists():
+            append_argmax(str(model_file))
+
+
+if __name__ == "__main__":
+    append_argmax_to_models()
@@ -0,0 +1,188 @@
+"""
+Dynamic request batching for NER inference
+"""
+import asyncio
+import bisect
+from collections import deque
+from typing import Callable, Deque, List, Optional, Sequence, Tuple
+from . import config
+
+
+class DynamicBatcher:
+    """
+    Coalesce concurrent requests into a single batched inference call
+
+    When a measure function is given, pending texts are grouped by token
+    length into buckets and every batch is drawn from a single bucket, so
+    short texts are not padded to the length of long ones.
+    """
+
+    def __init__(
+        self,
+        predict_batch: Callable[[List[str]], List],
+        max_batch_size: int = None,
+        timeout: float = None,
+        queue_size: int = None,
+        measure: Callable[[List[str]], List[int]] = None,
+        buckets: Sequence[int] = None,
+    ):
+        """
+        Initialize the batcher
+
+        Args:
+            predict_batch: Function running inference on a list of texts
+            max_batch_size: Maximum number of texts per inference call
+            timeout: Seconds a text may wait for more requests before its batch is flushed
+            queue_size: Maximum number of pending texts
+            measure: Function returning the token length of each text, enables bucketing
+            buckets: Upper token length of each bucket
+        """
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size or config.MAX_BATCH_SIZE
+        self.timeout = config.BATCH_TIMEOUT if timeout is None else timeout
+        self.queue_size = queue_size or config.BATCH_QUEUE_SIZE
+        self.measure = measure
+        self.buckets = tuple(sorted(buckets or config.BATCH_LENGTH_BUCKETS)) if measure else ()
+        # Pending (text, future, enqueue time) per bucket, oldest first
+        self._pending: List[Deque[Tuple[str, asyncio.Future, float]]] = [
+            deque() for _ in range(len(self.buckets) or 1)
+        ]
+        self._size = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the background consumer task"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the consumer task and fail all pending requests"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        for bucket in self._pending:
+            while bucket:
+                _, future, _ = bucket.popleft()
+                if not future.done():
+                    future.set_exception(RuntimeError("Batcher stopped"))
+        self._size = 0
+
+    def _check_capacity(self, count: int):
+        """Raise asyncio.QueueFull if count more texts do not fit in the queue"""
+        if self.queue_size - self._size < count:
+            raise asyncio.QueueFull()
+
+    async def submit_many(self, texts: List[str]) -> List[asyncio.Future]:
+        """
+        Enqueue texts for prediction
+
+        Args:
+            texts: Input texts
+
+        Returns:
+            One future per text, resolved with its prediction
+
+        Raises:
+            asyncio.QueueFull: If the queue cannot hold all texts
+        """
+        self._check_capacity(len(texts))
+
+        if self.buckets:
+            # Tokenizing shares a lock with the inference thread, keep it off the loop
+            lengths = await asyncio.to_thread(self.measure, texts)
+            # Other requests may have filled the queue in the meantime
+            self._check_capacity(len(texts))
+            # Lengths past the last bucket are truncated by the tokenizer anyway
+            last = len(self.buckets) - 1
+            indices = [min(bisect.bisect_left(self.buckets, length), last) for length in lengths]
+        else:
+            indices = [0] * len(texts)
+
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        futures = []
+        for text, index in zip(texts, indices):
+            future = loop.create_future()
+            self._pending[index].append((text, future, now))
+            futures.append(future)
+        self._size += len(texts)
+        self._wakeup.set()
+        return futures
+
+    async def submit(self, text: str) -> asyncio.Future:
+        """
+        Enqueue a single text for prediction
+
+        Args:
+            text: Input text
+
+        Returns:
+            Future resolved with the prediction
+        """
+        return (await self.submit_many([text]))[0]
+
+    async def _collect(self) -> List[Tuple[str, asyncio.Future]]:
+        """Wait until a bucket is full or its oldest text times out, then take a batch from it"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            now = loop.time()
+            ready = None
+            next_deadline = None
+            for bucket in self._pending:
+                if not bucket:
+                    continue
+                deadline = bucket[0][2] + self.timeout
+                if len(bucket) >= self.max_batch_size or deadline <= now:
+                    # Serve the bucket that has waited the longest first
+                    if ready is None or bucket[0][2] < ready[0][2]:
+                        ready = bucket
+                elif next_deadline is None or deadline < next_deadline:
+                    next_deadline = deadline
+
+            if ready is not None:
+                batch = [ready.popleft() for _ in range(min(len(ready), self.max_batch_size))]
+                self._size -= len(batch)
+                return [(text, future) for text, future, _ in batch]
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(),
+                    None if next_deadline is None else next_deadline - now
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    async def _process(self, batch: List[Tuple[str, asyncio.Future]]):
+        """Run inference on a batch in a worker thread and resolve its futures"""
+        # Drop requests whose clients have gone away
+        batch = [(text, future) for text, future in batch if not future.done()]
+        if not batch:
+            return
+
+        try:
+            # Keep the event loop free while ORT runs; requests arriving in
+            # the meantime are queued and form the next batch
+            results = await asyncio.to_thread(self.predict_batch, [text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _run(self):
+        """Consumer loop"""
+        while True:
+            batch = await self._collect()
+            await self._process(batch)
@@ -15,10 +15,20 @@ MODEL_DIR.mkdir(exist_ok=True)
 MODEL_FILE = MODEL_DIR / "ner_address_model_final.onnx"
 TOKENIZER_DIR = MODEL_DIR
 
+# INT8 dynamically quantized model, preferred over the FP32 model when present
+INT8_MODEL_FILE = MODEL_DIR / "ner_address_model_final.int8.onnx"
+USE_INT8 = os.getenv("USE_INT8", "1") == "1"
+
 # Google Drive file IDs
 GOOGLE_DRIVE_FILE_ID = "19wXYDJytJor4i5C_E4Q19aR4bDz5xd87"
 GOOGLE_DRIVE_FOLDER_ID = "1U3Kb-Nmv_8dXfLu_GF6w7KZXHQ7KC43P"
 
+# Expected SHA-256 digests of downloaded model files (unset skips verification).
+# The .onnx graph itself is left out because append_argmax.py rewrites it in place.
+MODEL_SHA256 = {
+    "ner_address_model_final.onnx.data": os.getenv("MODEL_DATA_SHA256"),
+}
+
 # API Configuration
 API_TITLE = "NER Address Vietnam API"
 API_VERSION = "1.0.0"
@@ -26,3 +36,74 @@ API_DESCRIPTION = "Named Entity Recognition API for Vietnamese Addresses using O
 
 # Model configuration
 MAX_LENGTH = 128
+# Output name of the label ids appended by append_argmax.py; read instead of
+# the logits when the graph has it
+PRED_IDS_OUTPUT = "pred_ids"
+
+# Prediction cache configuration (0 disables the cache)
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+# Tokenizer output cache configuration (0 disables the cache)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "8192"))
+
+# Dynamic batching configuration
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "16"))
+BATCH_TIMEOUT = float(os.getenv("BATCH_TIMEOUT", "0.005"))
+BATCH_QUEUE_SIZE = int(os.getenv("BATCH_QUEUE_SIZE", "100"))
+# Texts are grouped by token length so each batch pads to a similar length
+BATCH_LENGTH_BUCKETS = (32, 64, MAX_LENGTH)
+
+# Uvicorn worker processes (uvicorn also reads WEB_CONCURRENCY for --workers)
+WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+# Shared model host (python -m faskapi.model_host). When the address is set,
+# workers forward inference to the host instead of each loading the model.
+DEFAULT_MODEL_HOST_ADDRESS = "127.0.0.1:50055"
+MODEL_HOST_ADDRESS = os.getenv("MODEL_HOST_ADDRESS")
+# Required when the host is used: managers unpickle whatever reaches the
+# socket, so the key is what keeps other clients from running code in the host
+MODEL_HOST_AUTHKEY = os.getenv("MODEL_HOST_AUTHKEY", "").encode() or None
+
+# ONNX Runtime session configuration
+# Split the cores between workers to avoid oversubscription, unless a single
+# model host runs all inference
+ORT_INTRA_OP_THREADS = int(os.getenv(
+    "ORT_INTRA",
+    max(1, (os.cpu_count() or 4) // (1 if MODEL_HOST_ADDRESS else WORKERS))
+))
+# Share one CPU memory arena between all sessions of the process
+ORT_SHARED_ALLOCATOR = os.getenv("ORT_SHARED_ALLOCATOR", "1") == "1"
+# Cache the portable (ORT_ENABLE_EXTENDED) rewrites of the graph next to the
+# model (<model>.ort<version>.opt.onnx) and load it instead of the source
+# model on subsequent starts
+ORT_CACHE_OPTIMIZED_MODEL = os.getenv("ORT_CACHE_OPTIMIZED_MODEL", "1") == "1"
+
+# Extra sessions with the sequence dimension fixed to these lengths, e.g.
+# "32,128" (empty disables). Batches are padded up to the shortest length
+# that fits; each session holds its own copy of the weights.
+ORT_STATIC_SEQUENCE_LENGTHS = [
+    int(length) for length in os.getenv("ORT_STATIC_SEQUENCE_LENGTHS", "").split(",") if length.strip()
+]
+
+# Execution providers in order of preference; providers that are not
+# installed (e.g. onnxruntime-openvino) are skipped, CPU is always the fallback
+ONNX_PROVIDERS = [
+    name.strip()
+    for name in os.getenv(
+        "ONNX_PROVIDERS",
+        "OpenVINOExecutionProvider,DnnlExecutionProvider,CPUExecutionProvider"
+    ).split(",")
+    if name.strip()
+]
+ONNX_PROVIDER_OPTIONS = {
+    "OpenVINOExecutionProvider": {
+        "device_type": "CPU",
+        "precision": "FP32",
+        "cache_dir": str(MODEL_DIR / "ov_cache"),
+    },
+    "DnnlExecutionProvider": {},
+    "CPUExecutionProvider": {},
+}
+
+# Sequence lengths used to warm up the session on startup
+WARMUP_LENGTHS = (8, 32, 128, MAX_LENGTH)
+WARMUP_TEXT = "Số 1 Nguyễn Huệ"
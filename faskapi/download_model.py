@@ -1,29 +1,98 @@
 """
 Script to download model files from Google Drive
 """
-import gdown
+import hashlib
 import os
 from pathlib import Path
+import requests
 import zipfile
-try:
-    from . import config
-except ImportError:
-    import sys
-    sys.path.insert(0, os.path.dirname(__file__))
-    import config
+from . import config
 
 
-def download_from_google_drive(file_id: str, output_path: str):
+CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
+
+def sha256_of_file(path: str) -> str:
+    """
+    Compute the SHA-256 digest of a file
+    
+    Args:
+        path: Path to the file
+        
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_file_valid(path: str, sha256: str = None) -> bool:
+    """
+    Check that a file exists and, when a digest is given, that it matches
+    
+    Args:
+        path: Path to the file
+        sha256: Expected SHA-256 hex digest, or None to skip verification
+    """
+    if not os.path.exists(path):
+        return False
+    return sha256 is None or sha256_of_file(path) == sha256.lower()
+
+
+def download_from_google_drive(file_id: str, output_path: str, sha256: str = None):
     """
-    Download a file from Google Drive
+    Download a file from Google Drive, resuming a previous partial download
+    
+    Data is streamed in 1 MiB chunks to '<output_path>.part', which is only
+    renamed to output_path once complete (and verified, if sha256 is given).
     
     Args:
         file_id: Google Drive file ID
         output_path: Local path to save the file
+        sha256: Expected SHA-256 hex digest, or None to skip verification
     """
-    url = f"https://drive.google.com/uc?id={file_id}"
+    if is_file_valid(output_path, sha256):
+        print(f"Already downloaded: {output_path}")
+        return
+    
+    part_path = f"{output_path}.part"
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+    
+    url = "https://drive.usercontent.google.com/download"
+    params = {"id": file_id, "export": "download", "confirm": "t"}
     print(f"Downloading from Google Drive: {file_id}")
-    gdown.download(url, output_path, quiet=False)
+    
+    with requests.get(url, params=params, headers=headers, stream=True, timeout=60) as response:
+        if response.status_code == 416:
+            # Partial file already holds the whole content
+            print(f"Resuming: {part_path} is already complete")
+        else:
+            response.raise_for_status()
+            if response.headers.get("Content-Type", "").startswith("text/html"):
+                raise RuntimeError(f"Google Drive returned an HTML page instead of file {file_id}")
+            
+            if response.status_code == 206:
+                print(f"Resuming at {offset / (1024 * 1024):.2f} MB")
+                mode = 'ab'
+            else:
+                # Server ignored the Range header, start over
+                mode = 'wb'
+            
+            with open(part_path, mode) as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    f.write(chunk)
+    
+    if sha256 is not None:
+        actual = sha256_of_file(part_path)
+        if actual != sha256.lower():
+            os.remove(part_path)
+            raise ValueError(f"SHA-256 mismatch for {output_path}: expected {sha256}, got {actual}")
+    
+    os.replace(part_path, output_path)
     print(f"Downloaded to: {output_path}")
 
 
@@ -31,13 +100,29 @@ def download_folder_from_google_drive(folder_id: str, output_dir: str):
     """
     Download a folder from Google Drive
     
+    Files are fetched one by one with download_from_google_drive, so files
+    that are already complete are skipped and partial ones are resumed.
+    
     Args:
         folder_id: Google Drive folder ID
         output_dir: Local directory to save the files
     """
+    # Only needed to list the folder contents
+    import gdown
+    
     url = f"https://drive.google.com/drive/folders/{folder_id}"
     print(f"Downloading folder from Google Drive: {folder_id}")
-    gdown.download_folder(url, output=output_dir, quiet=False, use_cookies=False)
+    files = gdown.download_folder(url, output=output_dir, quiet=True, use_cookies=False, skip_download=True)
+    if files is None:
+        raise RuntimeError(f"Could not list Google Drive folder: {folder_id}")
+    
+    for file in files:
+        os.makedirs(os.path.dirname(file.local_path), exist_ok=True)
+        download_from_google_drive(
+            file.id,
+            file.local_path,
+            config.MODEL_SHA256.get(os.path.basename(file.local_path))
+        )
     print(f"Downloaded folder to: {output_dir}")
 
 
@@ -62,9 +147,12 @@ def download_models():
     # Create model directory if it doesn't exist
     config.MODEL_DIR.mkdir(parents=True, exist_ok=True)
     
-    # Check if critical files exist
+    # Check if critical files exist and match their expected digests
     model_onnx_exists = config.MODEL_FILE.exists()
-    model_data_exists = (config.MODEL_DIR / "ner_address_model_final.onnx.data").exists()
+    model_data_exists = is_file_valid(
+        str(config.MODEL_DIR / "ner_address_model_final.onnx.data"),
+        config.MODEL_SHA256.get("ner_address_model_final.onnx.data")
+    )
     config_exists = (config.MODEL_DIR / "config.json").exists()
     
     if model_onnx_exists and model_data_exists and config_exists:
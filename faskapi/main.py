@@ -2,12 +2,17 @@
 FastAPI application for NER Address Vietnam
 """
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from . import config
-from .schemas import NERRequest, NERResponse, HealthResponse, TokenLabel
+from .schemas import NERRequest, NERResponse, ExtractResponse, HealthResponse
 from .ner_model import get_model, ONNXNERModel
+from .batcher import DynamicBatcher
+from .model_host import get_remote_model
+import asyncio
 import os
-from typing import Dict
+from typing import Callable, Dict, List, Tuple
 
 
 # Create FastAPI app
@@ -15,6 +20,7 @@ app = FastAPI(
     title=config.API_TITLE,
     version=config.API_VERSION,
     description=config.API_DESCRIPTION,
+    default_response_class=ORJSONResponse,
 )
 
 # Add CORS middleware
@@ -29,20 +35,101 @@ app.add_middleware(
 # Model instance (lazy loaded)
 model: ONNXNERModel = None
 
+# Request batcher (created on startup)
+batcher: DynamicBatcher = None
+
+
+def _load_model():
+    """Get the model of this process, or a proxy to the shared model host when configured"""
+    if config.MODEL_HOST_ADDRESS:
+        return get_remote_model()
+    return get_model()
+
+
+def _analyze_batch(texts: List[str]):
+    """Run batched inference on the global model instance"""
+    return _load_model().analyze_batch(texts)
+
+
+def _token_lengths(texts: List[str]) -> List[int]:
+    """Token length of each text, used to bucket requests in the batcher"""
+    return _load_model().token_lengths(texts)
+
 
 @app.on_event("startup")
 async def startup_event():
-    """Load model on startup"""
-    global model
+    """Load model and start the request batcher on startup"""
+    global model, batcher
+    batcher = DynamicBatcher(_analyze_batch, measure=_token_lengths)
+    batcher.start()
+    
     try:
         print("Loading NER model...")
-        model = get_model()
+        model = _load_model()
         print("Model loaded successfully!")
+        if not config.MODEL_HOST_ADDRESS:
+            # The model host warms up its own session
+            print("Warming up model...")
+            model.warmup()
+            print("Model warmed up!")
     except Exception as e:
         print(f"Error loading model: {e}")
         print("Model will be loaded on first request")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the request batcher"""
+    if batcher is not None:
+        await batcher.stop()
+
+
+async def _ensure_model():
+    """Lazy load model if not loaded yet"""
+    global model
+    if model is None:
+        try:
+            # Loading takes seconds, do it off the event loop
+            model = await asyncio.to_thread(_load_model)
+        except Exception as e:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Model not available: {str(e)}"
+            )
+
+
+async def _call_model(method: Callable, *args):
+    """Call a model method, off the event loop when it is a round trip to the model host"""
+    if config.MODEL_HOST_ADDRESS:
+        return await run_in_threadpool(method, *args)
+    return method(*args)
+
+
+async def _analyze_texts(texts: List[str]) -> List[Tuple[List[str], List[str], Dict[str, List[str]]]]:
+    """Predict texts, answering cached ones directly and batching the rest"""
+    # One round trip to the model host for all texts
+    results = await _call_model(model.get_cached_analyses, texts)
+    missing = [i for i, result in enumerate(results) if result is None]
+    
+    if missing:
+        futures = await _enqueue([texts[i] for i in missing])
+        for i, result in zip(missing, await asyncio.gather(*futures)):
+            results[i] = result
+    
+    return results
+
+
+async def _enqueue(texts: List[str]) -> List[asyncio.Future]:
+    """Submit texts to the batcher, rejecting them if the queue is full"""
+    try:
+        return await batcher.submit_many(texts)
+    except asyncio.QueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, please retry later"
+        )
+
+
 @app.get("/", tags=["General"])
 async def root():
     """Root endpoint"""
@@ -75,14 +162,38 @@ async def health_check():
             message="Model file exists but not loaded yet"
         )
     
+    stats = await _call_model(model.cache_stats)
+    
     return HealthResponse(
         status="ok",
         model_loaded=True,
-        message="Service is healthy"
+        message="Service is healthy",
+        cache_hit_rate=stats["prediction_cache"]["hit_rate"]
     )
 
 
-@app.post("/predict", response_model=NERResponse, tags=["NER"])
+@app.get("/metrics", tags=["General"])
+async def metrics():
+    """Prediction and tokenizer cache metrics"""
+    if model is None:
+        return {"prediction_cache": None, "token_cache": None}
+    
+    return await _call_model(model.cache_stats)
+
+
+def _ner_response(text: str, tokens: List[str], labels: List[str], entities: Dict[str, List[str]]) -> Dict:
+    """Build a NERResponse-shaped dict without per-token model instances"""
+    return {
+        "text": text,
+        "tokens": tokens,
+        "labels": labels,
+        "entities": entities,
+    }
+
+
+# Hot endpoints return ORJSONResponse directly, skipping response_model
+# validation; the schemas are only used for the OpenAPI docs
+@app.post("/predict", responses={200: {"model": NERResponse}}, tags=["NER"])
 async def predict(request: NERRequest):
     """
     Perform NER prediction on input text
@@ -93,37 +204,53 @@ async def predict(request: NERRequest):
     Returns:
         NERResponse with tokens, labels, and extracted entities
     """
-    global model
-    
-    # Lazy load model if not loaded yet
-    if model is None:
-        try:
-            model = get_model()
-        except Exception as e:
-            raise HTTPException(
-                status_code=503,
-                detail=f"Model not available: {str(e)}"
-            )
+    await _ensure_model()
     
     try:
-        # Get predictions
-        token_labels = model.predict(request.text)
+        # Get predictions and entities from the cache or the batched inference
+        tokens, labels, entities = (await _analyze_texts([request.text]))[0]
         
-        # Extract entities
-        entities = model.extract_entities(request.text)
+        return ORJSONResponse(_ner_response(request.text, tokens, labels, entities))
         
-        # Format response
-        tokens = [
-            TokenLabel(token=token, label=label)
-            for token, label in token_labels
-        ]
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Prediction error: {str(e)}"
+        )
+
+
+@app.post("/batch_predict", responses={200: {"model": List[NERResponse]}}, tags=["NER"])
+async def batch_predict(batch: List[NERRequest]):
+    """
+    Perform NER prediction on a list of input texts
+    
+    Args:
+        batch: List of NERRequest with text field
         
-        return NERResponse(
-            text=request.text,
-            tokens=tokens,
-            entities=entities
+    Returns:
+        List of NERResponse, in the same order as the input
+    """
+    if len(batch) > config.BATCH_QUEUE_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: at most {config.BATCH_QUEUE_SIZE} texts per request"
         )
+    
+    await _ensure_model()
+    
+    try:
+        # Items share batches with concurrent /predict requests
+        analyses = await _analyze_texts([item.text for item in batch])
         
+        return ORJSONResponse([
+            _ner_response(item.text, tokens, labels, entities)
+            for item, (tokens, labels, entities) in zip(batch, analyses)
+        ])
+        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -131,7 +258,7 @@ async def predict(request: NERRequest):
         )
 
 
-@app.post("/extract", response_model=Dict, tags=["NER"])
+@app.post("/extract", responses={200: {"model": ExtractResponse}}, tags=["NER"])
 async def extract_entities(request: NERRequest):
     """
     Extract only the entities from input text
@@ -140,29 +267,18 @@ async def extract_entities(request: NERRequest):
         request: NERRequest with text field
         
     Returns:
-        Dictionary with extracted entities grouped by type
+        ExtractResponse with extracted entities grouped by type
     """
-    global model
-    
-    # Lazy load model if not loaded yet
-    if model is None:
-        try:
-            model = get_model()
-        except Exception as e:
-            raise HTTPException(
-                status_code=503,
-                detail=f"Model not available: {str(e)}"
-            )
+    await _ensure_model()
     
     try:
         # Extract entities
-        entities = model.extract_entities(request.text)
+        _, _, entities = (await _analyze_texts([request.text]))[0]
         
-        return {
-            "text": request.text,
-            "entities": entities
-        }
+        return ORJSONResponse({"text": request.text, "entities": entities})
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -172,4 +288,13 @@ async def extract_entities(request: NERRequest):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Workers need the app as an import string; each one loads its own
+    # session with ORT_INTRA_OP_THREADS = cores // WORKERS
+    uvicorn.run(
+        "faskapi.main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=config.WORKERS,
+        loop="uvloop",
+        http="httptools"
+    )
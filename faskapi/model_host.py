@@ -0,0 +1,169 @@
+"""
+Shared model host process
+
+Runs a single ONNXNERModel and serves it to every Uvicorn worker, so the
+session, tokenizer and caches are loaded once instead of once per worker
+and ONNX Runtime gets the whole intra-op thread budget. ORT thread pools do
+not survive fork(), so the session cannot simply be created before forking.
+
+Start the host, then the workers with the same MODEL_HOST_ADDRESS and
+MODEL_HOST_AUTHKEY:
+
+    export MODEL_HOST_AUTHKEY=$(openssl rand -hex 32)
+    MODEL_HOST_ADDRESS=127.0.0.1:50055 python -m faskapi.model_host
+    MODEL_HOST_ADDRESS=127.0.0.1:50055 uvicorn faskapi.main:app --workers 4
+"""
+import threading
+from multiprocessing.managers import BaseManager, BaseProxy
+from typing import Dict, List, Tuple
+from . import config
+from .ner_model import get_model
+
+
+# Methods of ONNXNERModel callable through the proxy
+EXPOSED_METHODS = (
+    'analyze_batch',
+    'get_cached_analysis',
+    'get_cached_analyses',
+    'token_lengths',
+    'cache_stats',
+)
+
+
+class ModelHostManager(BaseManager):
+    """
+    Manager sharing the model instance of the host process
+    """
+
+
+ModelHostManager.register('get_model', callable=get_model, exposed=EXPOSED_METHODS)
+
+
+def _parse_address(address: str) -> Tuple[str, int]:
+    """Split a host:port string"""
+    host, _, port = address.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+def _require_authkey() -> bytes:
+    """
+    Get the key authenticating workers to the model host
+
+    Raises:
+        RuntimeError: If MODEL_HOST_AUTHKEY is not set
+    """
+    if not config.MODEL_HOST_AUTHKEY:
+        raise RuntimeError(
+            "MODEL_HOST_AUTHKEY must be set to use the model host, "
+            "e.g. export MODEL_HOST_AUTHKEY=$(openssl rand -hex 32)"
+        )
+    return config.MODEL_HOST_AUTHKEY
+
+
+def _connect():
+    """Connect to the model host and get a proxy to its model instance"""
+    manager = ModelHostManager(
+        address=_parse_address(config.MODEL_HOST_ADDRESS),
+        authkey=_require_authkey()
+    )
+    manager.connect()
+    return manager.get_model()
+
+
+class RemoteModel:
+    """
+    Proxy to the host model that reconnects when the host restarts
+
+    A manager proxy is bound to the server process it came from, so once the
+    host goes away every call fails; the first failing call reconnects and
+    is retried once. Each thread talks to the host over its own connection;
+    the host serves every connection in a separate thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._proxy = _connect()
+        self._address = self._proxy._token.address
+
+    def _reconnect(self, stale):
+        """Replace the stale proxy, unless another thread already did"""
+        with self._lock:
+            if self._proxy is stale:
+                self._proxy = None
+                # Proxies share their per-thread connections by server address,
+                # so a new proxy would otherwise reuse the dead sockets
+                BaseProxy._address_to_local.pop(self._address, None)
+                self._proxy = _connect()
+                self._address = self._proxy._token.address
+            return self._proxy
+
+    def _call(self, method: str, *args):
+        """Call a method of the host model, reconnecting once if the host went away"""
+        proxy = self._proxy
+        if proxy is None:
+            proxy = self._reconnect(None)
+        try:
+            return getattr(proxy, method)(*args)
+        except (EOFError, ConnectionError):
+            print("Lost connection to the model host, reconnecting...")
+            return getattr(self._reconnect(proxy), method)(*args)
+
+    def analyze_batch(self, texts: List[str]):
+        """See ONNXNERModel.analyze_batch"""
+        return self._call('analyze_batch', texts)
+
+    def get_cached_analysis(self, text: str):
+        """See ONNXNERModel.get_cached_analysis"""
+        return self._call('get_cached_analysis', text)
+
+    def get_cached_analyses(self, texts: List[str]):
+        """See ONNXNERModel.get_cached_analyses"""
+        return self._call('get_cached_analyses', texts)
+
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        """See ONNXNERModel.token_lengths"""
+        return self._call('token_lengths', texts)
+
+    def cache_stats(self) -> Dict:
+        """See ONNXNERModel.cache_stats"""
+        return self._call('cache_stats')
+
+
+# Remote model of this worker, shared by its threads
+_remote_model: RemoteModel = None
+_remote_lock = threading.Lock()
+
+
+def get_remote_model() -> RemoteModel:
+    """
+    Connect to the model host and get a proxy to its model instance
+
+    Returns:
+        RemoteModel exposing EXPOSED_METHODS of the host ONNXNERModel
+    """
+    global _remote_model
+    if _remote_model is None:
+        with _remote_lock:
+            if _remote_model is None:
+                _remote_model = RemoteModel()
+    return _remote_model
+
+
+def serve():
+    """Load and warm up the model, then serve it until interrupted"""
+    address = _parse_address(config.MODEL_HOST_ADDRESS or config.DEFAULT_MODEL_HOST_ADDRESS)
+    authkey = _require_authkey()
+
+    print("Loading NER model...")
+    model = get_model()
+    print("Warming up model...")
+    model.warmup()
+
+    manager = ModelHostManager(address=address, authkey=authkey)
+    server = manager.get_server()
+    print(f"Model host listening on {address[0]}:{address[1]}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    serve()
@@ -3,10 +3,200 @@ ONNX Runtime NER Model Implementation
 """
 import numpy as np
 import onnxruntime as ort
-from transformers import AutoTokenizer
-from typing import List, Dict, Tuple
+from transformers import AutoTokenizer, PreTrainedTokenizerFast
+from typing import List, Dict, Optional, Tuple
 from . import config
+from .cache import LRUCache
 import os
+import threading
+import unicodedata
+
+try:
+    from numba import njit
+except ImportError:  # Numba is optional, decoding falls back to NumPy
+    njit = None
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, cache writes are not locked there
+    fcntl = None
+
+
+def _find_segments_loop(pred_ids, is_begin, is_inside, type_ids):
+    """
+    Scan IOB label ids once and return entity segments
+    
+    Compiled with Numba when it is installed.
+    
+    Returns:
+        Tuple of (starts, ends, types, member): start and end (exclusive,
+        after the last member) position and type index of each entity, and
+        a mask of the positions that belong to an entity
+    """
+    n = pred_ids.shape[0]
+    starts = np.empty(n, dtype=np.int32)
+    ends = np.empty(n, dtype=np.int32)
+    types = np.empty(n, dtype=np.int32)
+    member = np.zeros(n, dtype=np.bool_)
+    count = 0
+    current_type = -1
+    
+    for i in range(n):
+        label_id = pred_ids[i]
+        if is_begin[label_id]:
+            current_type = type_ids[label_id]
+            starts[count] = i
+            ends[count] = i + 1
+            types[count] = current_type
+            member[i] = True
+            count += 1
+        elif is_inside[label_id] and current_type >= 0:
+            # I- tags of another type are skipped but keep the entity open
+            if type_ids[label_id] == current_type:
+                ends[count - 1] = i + 1
+                member[i] = True
+        else:
+            current_type = -1
+    
+    return starts[:count], ends[:count], types[:count], member
+
+
+def _find_segments_numpy(pred_ids, is_begin, is_inside, type_ids):
+    """
+    Vectorized equivalent of _find_segments_loop for when Numba is not installed
+    """
+    begin = is_begin[pred_ids]
+    inside = is_inside[pred_ids]
+    types = type_ids[pred_ids]
+    
+    starts = np.flatnonzero(begin)
+    if starts.size == 0:
+        return starts, starts, starts, np.zeros(len(pred_ids), dtype=bool)
+    
+    # Each entity ends at the first B- or O tag after its start
+    boundaries = np.append(np.flatnonzero(begin | ~inside), len(pred_ids))
+    stops = boundaries[np.searchsorted(boundaries, starts, side="right")]
+    
+    # Assign every position to the entity started before it and keep the
+    # positions inside that entity whose type matches
+    positions = np.arange(len(pred_ids))
+    segment = np.searchsorted(starts, positions, side="right") - 1
+    member = segment >= 0
+    member[member] = (
+        (positions[member] < stops[segment[member]])
+        & (types[member] == types[starts[segment[member]]])
+    )
+    
+    # Every entity has at least its start as member, so the last member of
+    # each one is where the segment index changes
+    members = np.flatnonzero(member)
+    last = members[np.append(np.flatnonzero(np.diff(segment[members])), len(members) - 1)]
+    
+    return starts, last + 1, types[starts], member
+
+
+# Compiled eagerly for the argument types used by ONNXNERModel, so no JIT
+# happens on the first request (the machine code is cached on disk)
+_FIND_SEGMENTS_SIGNATURE = (
+    "Tuple((int32[:], int32[:], int32[:], boolean[:]))(int32[:], boolean[:], boolean[:], int8[:])"
+)
+_find_segments = (
+    njit(_FIND_SEGMENTS_SIGNATURE, cache=True)(_find_segments_loop) if njit is not None
+    else _find_segments_numpy
+)
+
+
+def _join_tokens(tokens: List[str]) -> str:
+    """Join WordPiece tokens, gluing subword tokens (##) to the previous one"""
+    entity = ""
+    for i, token in enumerate(tokens):
+        if token.startswith("##"):
+            entity += token[2:]  # Append without space
+        elif i == 0:
+            entity = token
+        else:
+            entity += " " + token  # Append with space
+    return entity
+
+
+def _slice_member_runs(text: str, offsets: np.ndarray, member: np.ndarray, start: int, end: int) -> str:
+    """
+    Slice the member tokens of an entity from the text
+    
+    Tokens skipped inside the entity (I- tags of another type) split it into
+    runs of consecutive members; each run is sliced and the runs are joined
+    with a space, like _join_tokens does for whole words.
+    """
+    positions = np.flatnonzero(member[start:end]) + start
+    runs = np.split(positions, np.flatnonzero(np.diff(positions) > 1) + 1)
+    return " ".join(text[offsets[run[0], 0]:offsets[run[-1], 1]] for run in runs)
+
+
+_env_allocator_registered = False
+
+
+def _register_env_allocator():
+    """Register one CPU arena allocator on the ORT environment, shared by all sessions of the process"""
+    global _env_allocator_registered
+    if not _env_allocator_registered:
+        memory_info = ort.OrtMemoryInfo(
+            "Cpu", ort.OrtAllocatorType.ORT_ARENA_ALLOCATOR, 0, ort.OrtMemType.DEFAULT
+        )
+        ort.create_and_register_allocator(memory_info, None)
+        _env_allocator_registered = True
+
+
+def _normalize_text(text: str) -> str:
+    """
+    Canonical form of an input text, used as cache key and model input
+    
+    Composed (NFC) Vietnamese diacritics and no surrounding whitespace; case
+    is kept because entity values are sliced from this text.
+    """
+    return unicodedata.normalize("NFC", text).strip()
+
+
+def _copy_analysis(tokens, labels, entities) -> Tuple[List[str], List[str], Dict[str, List[str]]]:
+    """Fresh lists of an analysis, so callers cannot modify a shared or cached one"""
+    return list(tokens), list(labels), {entity_type: list(values) for entity_type, values in entities.items()}
+
+
+def _load_tokenizer(path: str):
+    """
+    Load the tokenizer, converting it to a fast (Rust) tokenizer when the
+    model directory only ships slow tokenizer files
+    
+    Args:
+        path: Tokenizer directory
+        
+    Returns:
+        Fast tokenizer when available or convertible, else the slow one
+    """
+    tokenizer = AutoTokenizer.from_pretrained(path, use_fast=True)
+    if tokenizer.is_fast:
+        return tokenizer
+    
+    try:
+        from transformers.convert_slow_tokenizer import convert_slow_tokenizer
+        fast_tokenizer = PreTrainedTokenizerFast(
+            tokenizer_object=convert_slow_tokenizer(tokenizer),
+            model_max_length=tokenizer.model_max_length,
+            padding_side=tokenizer.padding_side,
+            **tokenizer.special_tokens_map
+        )
+    except Exception as e:  # No converter for this tokenizer class
+        print(f"Fast tokenizer not available, using slow tokenizer: {e}")
+        return tokenizer
+    
+    print(f"Converted {type(tokenizer).__name__} to a fast tokenizer")
+    return fast_tokenizer
+
+
+def _default_model_file():
+    """Pick the INT8 model when enabled and available, else the FP32 model"""
+    if config.USE_INT8 and config.INT8_MODEL_FILE.exists():
+        return config.INT8_MODEL_FILE
+    return config.MODEL_FILE
 
 
 class ONNXNERModel:
@@ -22,30 +212,64 @@ class ONNXNERModel:
             model_path: Path to the ONNX model file
             tokenizer_path: Path to the tokenizer directory
         """
-        self.model_path = model_path or str(config.MODEL_FILE)
+        self.model_path = model_path or str(_default_model_file())
         self.tokenizer_path = tokenizer_path or str(config.MODEL_DIR)
         
         # Check if model file exists
         if not os.path.exists(self.model_path):
             raise FileNotFoundError(
                 f"Model file not found: {self.model_path}\n"
-                f"Please run 'python faskapi/download_model.py' to download the model."
+                f"Please run 'python -m faskapi.download_model' to download the model."
             )
         
-        # Load ONNX model
-        print(f"Loading ONNX model from: {self.model_path}")
-        self.session = ort.InferenceSession(
-            self.model_path,
-            providers=['CPUExecutionProvider']
+        self.providers, provider_options = self._select_providers()
+        print(f"Using execution providers: {self.providers}")
+        
+        # Graphs partitioned to other providers cannot be serialized, so the
+        # optimized graph cache is only used when running on the CPU provider alone
+        self.optimized_model_path = self._optimized_model_path()
+        self._cache_optimized_model = (
+            config.ORT_CACHE_OPTIMIZED_MODEL and self.providers == ['CPUExecutionProvider']
         )
+        self.session = self._create_session(provider_options)
+        
+        # Optional sessions specialized to a fixed sequence length, tried
+        # from the shortest one; the dynamic session handles longer batches
+        sequence_dim = self.session.get_inputs()[0].shape[1]
+        self._static_sessions = []
+        if config.ORT_STATIC_SEQUENCE_LENGTHS and not isinstance(sequence_dim, str):
+            print("Model has no named sequence dimension, skipping fixed-length sessions")
+        elif config.ORT_STATIC_SEQUENCE_LENGTHS:
+            for length in sorted(set(config.ORT_STATIC_SEQUENCE_LENGTHS)):
+                session = self._create_session(provider_options, sequence_dim, length)
+                self._static_sessions.append((length, session, session.io_binding()))
         
         # Load tokenizer from model directory
         print(f"Loading tokenizer from: {self.tokenizer_path}")
-        self.tokenizer = AutoTokenizer.from_pretrained(self.tokenizer_path)
+        self.tokenizer = _load_tokenizer(self.tokenizer_path)
         
         # Get model input/output names
         self.input_names = [input.name for input in self.session.get_inputs()]
         self.output_names = [output.name for output in self.session.get_outputs()]
+        self._input_names = set(self.input_names)
+        self._output_name = (
+            config.PRED_IDS_OUTPUT if config.PRED_IDS_OUTPUT in self.output_names
+            else self.output_names[0]
+        )
+        
+        # Input buffers reused across calls, filled in place and bound through IOBinding
+        self._feed_names = [
+            name for name in ('input_ids', 'attention_mask', 'token_type_ids')
+            if name in self._input_names
+        ]
+        self._output_shape, self._output_dtype = self._static_output_layout()
+        self._buffers = {}
+        self._allocate_buffers(config.MAX_BATCH_SIZE * config.MAX_LENGTH)
+        self._io_binding = self.session.io_binding()
+        self._io_lock = threading.Lock()
+        # Fast tokenizers fail with "Already borrowed" when called concurrently
+        # with padding/truncation settings, e.g. by the batcher and a worker thread
+        self._tokenizer_lock = threading.Lock()
         
         # Load label mapping from config
         import json
@@ -69,30 +293,368 @@ class ONNXNERModel:
                 8: "I-PROVINCE",
             }
         
+        self._build_label_tables()
+        
+        # Cache of final predictions keyed on the normalized text (NFC,
+        # stripped); a new model instance starts with an empty cache
+        self.prediction_cache = LRUCache(config.PREDICTION_CACHE_SIZE)
+        # Unpadded tokenizer output per text, outlives evicted predictions
+        self.token_cache = LRUCache(config.TOKEN_CACHE_SIZE)
+        
         print("Model loaded successfully!")
     
-    def tokenize(self, text: str) -> Dict[str, np.ndarray]:
+    def _select_providers(self) -> Tuple[List[str], List[Dict[str, str]]]:
+        """
+        Pick the configured execution providers that are available in this build
+        
+        Returns:
+            Tuple of provider names and their options
+        """
+        available = ort.get_available_providers()
+        providers = []
+        for provider in config.ONNX_PROVIDERS:
+            if provider in available:
+                providers.append(provider)
+            else:
+                print(f"Execution provider not available, skipping: {provider}")
+        
+        if 'CPUExecutionProvider' not in providers:
+            providers.append('CPUExecutionProvider')
+        
+        return providers, [dict(config.ONNX_PROVIDER_OPTIONS.get(provider, {})) for provider in providers]
+    
+    def _optimized_model_path(self, sequence_length: int = None) -> str:
+        """
+        Path of the cached ORT-optimized graph, one per fixed sequence length
+        
+        The onnxruntime version is part of the name, since the serialized
+        graph may use operators or rewrites of the version that wrote it.
+        """
+        suffix = f".seq{sequence_length}" if sequence_length else ""
+        return f"{self.model_path}{suffix}.ort{ort.__version__}.opt.onnx"
+    
+    def _optimized_model_is_fresh(self, optimized_path: str) -> bool:
+        """Check whether the cached optimized graph exists and is newer than the source model"""
+        return (
+            os.path.exists(optimized_path)
+            and os.path.getmtime(optimized_path) >= os.path.getmtime(self.model_path)
+        )
+    
+    def _create_session(
+        self, provider_options: List[Dict[str, str]], sequence_dim: str = None, sequence_length: int = None
+    ) -> ort.InferenceSession:
         """
-        Tokenize input text
+        Load the ONNX model, preferring the cached ORT-optimized graph
         
         Args:
-            text: Input text
+            provider_options: Options of each execution provider
+            sequence_dim: Name of the sequence dimension to fix
+            sequence_length: Fixed sequence length, None keeps the dimension dynamic
             
         Returns:
-            Dictionary with tokenized inputs
+            InferenceSession
         """
-        encoded = self.tokenizer(
-            text,
-            padding="max_length",
-            truncation=True,
-            max_length=config.MAX_LENGTH,
-            return_tensors="np"
+        optimized_path = self._optimized_model_path(sequence_length)
+        use_cache = self._cache_optimized_model and self._prepare_optimized_model(
+            optimized_path, provider_options, sequence_dim, sequence_length
         )
-        # Ensure correct dtype for ONNX
-        return {
-            'input_ids': encoded['input_ids'].astype(np.int64),
-            'attention_mask': encoded['attention_mask'].astype(np.int64)
-        }
+        session_path = optimized_path if use_cache else self.model_path
+        
+        so = self._create_session_options(sequence_dim, sequence_length)
+        if sequence_length:
+            print(f"Loading ONNX model from: {session_path} (sequence length {sequence_length})")
+        else:
+            print(f"Loading ONNX model from: {session_path}")
+        
+        try:
+            return ort.InferenceSession(
+                session_path,
+                sess_options=so,
+                providers=self.providers,
+                provider_options=provider_options
+            )
+        except Exception as e:
+            if not use_cache:
+                raise
+            # A cache left behind by an interrupted write, fall back to the source model
+            print(f"Could not load the optimized ONNX model ({e}), loading: {self.model_path}")
+            return ort.InferenceSession(
+                self.model_path,
+                sess_options=so,
+                providers=self.providers,
+                provider_options=provider_options
+            )
+    
+    def _prepare_optimized_model(
+        self,
+        optimized_path: str,
+        provider_options: List[Dict[str, str]],
+        sequence_dim: str = None,
+        sequence_length: int = None
+    ) -> bool:
+        """
+        Write the cached ORT-optimized graph unless another process already did
+        
+        Processes starting together (Uvicorn workers) take a file lock, so the
+        first one writes the cache and the others wait for it and reuse it.
+        
+        Args:
+            optimized_path: Path of the cached optimized graph
+            provider_options: Options of each execution provider
+            sequence_dim: Name of the sequence dimension to fix
+            sequence_length: Fixed sequence length, None keeps the dimension dynamic
+            
+        Returns:
+            Whether a complete, fresh cache can be loaded
+        """
+        try:
+            lock_file = open(f"{optimized_path}.lock", "a")
+        except OSError:
+            # Read-only model directory: nobody can be writing there, use a
+            # cache built beforehand if there is one
+            return self._optimized_model_is_fresh(optimized_path)
+        
+        with lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            if self._optimized_model_is_fresh(optimized_path):
+                return True
+            
+            try:
+                # A throwaway session writes the cache; the serving session
+                # still applies the hardware specific optimizations on top of it
+                print(f"Writing optimized ONNX model to: {optimized_path}")
+                ort.InferenceSession(
+                    self.model_path,
+                    sess_options=self._create_session_options(sequence_dim, sequence_length, optimized_path),
+                    providers=self.providers,
+                    provider_options=provider_options
+                )
+            except Exception as e:
+                print(f"Could not cache the optimized ONNX model: {e}")
+                # Do not leave a partial graph that looks fresh
+                for path in (optimized_path, f"{optimized_path}.data"):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                return False
+            
+            return self._optimized_model_is_fresh(optimized_path)
+    
+    def _create_session_options(
+        self, sequence_dim: str = None, sequence_length: int = None, optimized_path: str = None
+    ) -> ort.SessionOptions:
+        """
+        Build ONNX Runtime session options tuned for CPU inference
+        
+        Args:
+            sequence_dim: Name of the sequence dimension to fix
+            sequence_length: Fixed sequence length, None keeps the dimension dynamic
+            optimized_path: Where to serialize the optimized graph, None for the serving session
+            
+        Returns:
+            SessionOptions with graph optimization and thread settings
+        """
+        so = ort.SessionOptions()
+        # Parallelize inside operators only, so threads do not fight the web server
+        so.intra_op_num_threads = config.ORT_INTRA_OP_THREADS
+        so.inter_op_num_threads = 1
+        so.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        so.enable_mem_pattern = True
+        so.add_session_config_entry("session.disable_prepacking", "0")
+        if config.ORT_SHARED_ALLOCATOR:
+            # Every session of the process allocates from one arena instead of its own
+            _register_env_allocator()
+            so.add_session_config_entry("session.use_env_allocators", "1")
+        if sequence_length:
+            # Static shape lets ORT specialize kernels and fusions for this length
+            so.add_free_dimension_override_by_name(sequence_dim, sequence_length)
+        
+        if optimized_path is None:
+            # Constant folding, layer fusion and MLAS-friendly rewrites
+            so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            return so
+        
+        # Layout rewrites of ORT_ENABLE_ALL (e.g. NCHWc) depend on the CPU they
+        # ran on, so only the portable fusions are serialized
+        so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+        so.optimized_model_filepath = optimized_path
+        # Keep the weights out of the protobuf, like the source .onnx.data
+        so.add_session_config_entry(
+            "session.optimized_model_external_initializers_file_name",
+            f"{os.path.basename(optimized_path)}.data"
+        )
+        so.add_session_config_entry(
+            "session.optimized_model_external_initializers_min_size_in_bytes",
+            "1024"
+        )
+        
+        return so
+    
+    def _static_output_layout(self) -> Tuple[Optional[Tuple[int, ...]], Optional[type]]:
+        """
+        Get the trailing dimensions and dtype of the read output, when they are static
+        
+        Returns:
+            Trailing shape after [batch_size, seq_len] (empty for pred_ids,
+            (num_labels,) for logits) and NumPy dtype, or (None, None) when
+            the output buffer has to be allocated by ONNX Runtime
+        """
+        output = next(output for output in self.session.get_outputs() if output.name == self._output_name)
+        dtype = {'tensor(int64)': np.int64, 'tensor(float)': np.float32}.get(output.type)
+        trailing = tuple(output.shape[2:])
+        if dtype is None or len(output.shape) < 2 or not all(isinstance(dim, int) for dim in trailing):
+            return None, None
+        return trailing, dtype
+    
+    def _allocate_buffers(self, size: int):
+        """
+        Allocate flat input and output buffers holding at least size positions
+        
+        Args:
+            size: Number of positions (batch size x sequence length)
+        """
+        for name in self._feed_names:
+            self._buffers[name] = np.zeros(size, dtype=np.int64)
+        if self._output_dtype is not None:
+            self._output_buffer = np.empty(size * int(np.prod(self._output_shape)), dtype=self._output_dtype)
+    
+    def _tokenize_rows(self, texts: List[str], count_hits: bool = True) -> List[Dict[str, np.ndarray]]:
+        """
+        Tokenize texts without padding, reusing cached tokenizer output
+        
+        Texts missing from the token cache are tokenized together in one call.
+        
+        Args:
+            texts: Input texts
+            count_hits: Whether cache hits count in the token cache stats
+            
+        Returns:
+            Read-only 1-D arrays for each text (input_ids, attention_mask,
+            token_type_ids when produced, and offset_mapping for fast tokenizers)
+        """
+        lookup = self.token_cache.get if count_hits else self.token_cache.peek
+        rows = [lookup(text) for text in texts]
+        missing = [i for i, row in enumerate(rows) if row is None]
+        if not missing:
+            return rows
+        
+        # Fast tokenizers also return character offsets of every token
+        with self._tokenizer_lock:
+            encoded = self.tokenizer(
+                [texts[i] for i in missing],
+                padding=True,
+                truncation=True,
+                max_length=config.MAX_LENGTH,
+                return_offsets_mapping=self.tokenizer.is_fast,
+                return_tensors="np"
+            )
+        
+        for j, i in enumerate(missing):
+            # Strip padding, whichever side the tokenizer pads on
+            mask = encoded['attention_mask'][j].astype(bool)
+            row = {name: values[j][mask] for name, values in encoded.items()}
+            for values in row.values():
+                values.flags.writeable = False
+            self.token_cache.put(texts[i], row)
+            rows[i] = row
+        
+        return rows
+    
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        """
+        Count tokens of each text, special tokens included
+        
+        Args:
+            texts: Input texts
+            
+        Returns:
+            Token length of each text after truncation
+        """
+        texts = [_normalize_text(text) for text in texts]
+        return [len(row['input_ids']) for row in self._tokenize_rows(texts)]
+    
+    def _run_session(self, rows: List[Dict[str, np.ndarray]]) -> np.ndarray:
+        """
+        Pad tokenized rows into the reusable buffers and run the session
+        
+        Args:
+            rows: Unpadded tokenizer output of each text
+            
+        Returns:
+            Predicted int32 label ids, shape: [batch_size, seq_len], where seq_len
+            may be padded up to a fixed-length session
+        """
+        batch_size = len(rows)
+        seq_len = max(len(row['input_ids']) for row in rows)
+        session, io_binding = self.session, self._io_binding
+        for length, static_session, static_io_binding in self._static_sessions:
+            if seq_len <= length:
+                seq_len, session, io_binding = length, static_session, static_io_binding
+                break
+        size = batch_size * seq_len
+        pad_values = {'input_ids': self.tokenizer.pad_token_id or 0}
+        
+        with self._io_lock:
+            if size > self._buffers['input_ids'].size:
+                # Larger than MAX_BATCH_SIZE x MAX_LENGTH, grow once and keep it
+                self._allocate_buffers(size)
+            
+            for name in self._feed_names:
+                # Leading slice of the flat buffer stays C-contiguous
+                buffer = self._buffers[name][:size].reshape(batch_size, seq_len)
+                buffer.fill(pad_values.get(name, 0))
+                for i, row in enumerate(rows):
+                    # Missing token_type_ids stay zero
+                    if name in row:
+                        np.copyto(buffer[i, :len(row[name])], row[name], casting='unsafe')
+                io_binding.bind_input(
+                    name, 'cpu', 0, np.int64, [batch_size, seq_len], buffer.ctypes.data
+                )
+            
+            if self._output_dtype is None:
+                io_binding.bind_output(self._output_name, 'cpu')
+                session.run_with_iobinding(io_binding)
+                outputs = io_binding.copy_outputs_to_cpu()[0]
+            else:
+                # ORT writes straight into the reused output buffer
+                shape = (batch_size, seq_len) + self._output_shape
+                outputs = self._output_buffer[:size * int(np.prod(self._output_shape))].reshape(shape)
+                io_binding.bind_output(
+                    self._output_name, 'cpu', 0, self._output_dtype, list(shape), outputs.ctypes.data
+                )
+                session.run_with_iobinding(io_binding)
+            
+            # Reduce (or copy) before releasing the buffer to the next batch;
+            # label ids fit in int32, which halves the memory decoding walks
+            if outputs.ndim == 3:
+                # Logits, shape: [batch_size, seq_len, num_labels]
+                return outputs.argmax(-1).astype(np.int32)
+            # Graph with an appended ArgMax node already returns label ids
+            return outputs.astype(np.int32)
+    
+    def warmup(self, lengths: Tuple[int, ...] = None):
+        """
+        Run dummy inference for every sequence length the batcher is likely to hit,
+        so kernel setup and memory planning happen before the first request
+        
+        Warmup texts are removed from the token cache afterwards.
+        
+        Args:
+            lengths: Approximate token counts of the dummy texts
+        """
+        lengths = lengths or config.WARMUP_LENGTHS
+        for length in sorted(set(lengths)):
+            self._analyze_uncached(["a " * length] * config.MAX_BATCH_SIZE)
+        
+        # A real single address, twice: the typical request shape and the
+        # decoding path (Numba compilation, offsets slicing) on Vietnamese text
+        for _ in range(2):
+            self._analyze_uncached([config.WARMUP_TEXT])
+        
+        # Dummy texts should neither take token cache slots nor count in /metrics
+        self.token_cache.clear()
     
     def predict(self, text: str) -> List[Tuple[str, str]]:
         """
@@ -104,35 +666,153 @@ class ONNXNERModel:
         Returns:
             List of (token, label) tuples
         """
-        # Tokenize
-        encoded = self.tokenize(text)
+        tokens, labels, _ = self.analyze_batch([text])[0]
+        return list(zip(tokens, labels))
+    
+    def predict_batch(self, texts: List[str]) -> List[List[Tuple[str, str]]]:
+        """
+        Perform NER prediction on a batch of texts
         
-        # Prepare inputs for ONNX model
-        onnx_inputs = {
-            'input_ids': encoded['input_ids'],
-            'attention_mask': encoded['attention_mask']
+        Args:
+            texts: Input texts
+            
+        Returns:
+            List of (token, label) tuples for each text
+        """
+        return [list(zip(tokens, labels)) for tokens, labels, _ in self.analyze_batch(texts)]
+    
+    def cache_stats(self) -> Dict[str, Dict]:
+        """
+        Get prediction and tokenizer cache statistics
+        
+        Returns:
+            Dictionary with the stats of each cache
+        """
+        return {
+            "prediction_cache": self.prediction_cache.stats(),
+            "token_cache": self.token_cache.stats(),
         }
+    
+    def get_cached_analysis(self, text: str) -> Optional[Tuple[List[str], List[str], Dict[str, List[str]]]]:
+        """
+        Get the predictions and entities for a text from the cache
         
-        # Run inference with explicit input/output names
-        outputs = self.session.run(['logits'], onnx_inputs)
+        Args:
+            text: Input text
+            
+        Returns:
+            Tuple of tokens, labels and entities, or None if the text is not cached
+        """
+        cached = self.prediction_cache.get(_normalize_text(text))
+        if cached is None:
+            return None
+        return _copy_analysis(*cached)
+    
+    def get_cached_analyses(self, texts: List[str]) -> List[Optional[Tuple[List[str], List[str], Dict[str, List[str]]]]]:
+        """
+        Get the predictions and entities of several texts from the cache in one call
         
-        # Get predictions from logits
-        logits = outputs[0]  # Shape: [batch_size, seq_len, num_labels]
-        predictions = np.argmax(logits, axis=-1)[0]  # Shape: [seq_len]
+        Saves a round trip per text when the model is used through the model host.
         
-        # Get tokens
-        tokens = self.tokenizer.convert_ids_to_tokens(encoded['input_ids'][0])
+        Args:
+            texts: Input texts
+            
+        Returns:
+            Tuple of tokens, labels and entities for each text, None for texts that are not cached
+        """
+        return [self.get_cached_analysis(text) for text in texts]
+    
+    def analyze_batch(self, texts: List[str]) -> List[Tuple[List[str], List[str], Dict[str, List[str]]]]:
+        """
+        Predict labels and extract entities for a batch of texts, running a
+        single inference call for the distinct texts that are not cached
+        
+        Texts are normalized first (see _normalize_text), so variants that
+        differ only in Unicode composition or surrounding whitespace share
+        one cache entry.
+        
+        Args:
+            texts: Input texts
+            
+        Returns:
+            Tuple of tokens, labels (parallel lists) and entities for each text
+        """
+        texts = [_normalize_text(text) for text in texts]
+        results = self.get_cached_analyses(texts)
+        missing = list(dict.fromkeys(text for text, result in zip(texts, results) if result is None))
         
-        # Create result pairs (skip special tokens)
-        results = []
-        for token, pred_id in zip(tokens, predictions):
-            if token not in ['[CLS]', '[SEP]', '[PAD]']:
-                label = self.id2label.get(int(pred_id), "O")
-                results.append((token, label))
+        if missing:
+            computed = dict(zip(missing, self._analyze_uncached(missing)))
+            for text, (tokens, labels, entities) in computed.items():
+                # Store an immutable copy, callers get their own lists
+                self.prediction_cache.put(
+                    text,
+                    (tuple(tokens), tuple(labels), {entity_type: tuple(values) for entity_type, values in entities.items()})
+                )
+            results = [
+                result if result is not None else _copy_analysis(*computed[text])
+                for text, result in zip(texts, results)
+            ]
         
         return results
     
-    def extract_entities(self, text: str) -> Dict[str, List[str]]:
+    def _analyze_uncached(self, texts: List[str]) -> List[Tuple[List[str], List[str], Dict[str, List[str]]]]:
+        """
+        Run tokenizer and model on a batch of texts in a single inference call
+        
+        Args:
+            texts: Input texts
+            
+        Returns:
+            Tuple of tokens, labels and entities for each text
+        """
+        # Batched texts were already looked up when the batcher measured them
+        rows = self._tokenize_rows(texts, count_hits=False)
+        
+        # Run inference once for the whole batch, padded to the longest text
+        predictions = self._run_session(rows)
+        
+        return [
+            self._decode_predictions(
+                text,
+                row['input_ids'],
+                predictions[i, :len(row['input_ids'])],
+                row.get('offset_mapping')
+            )
+            for i, (text, row) in enumerate(zip(texts, rows))
+        ]
+    
+    def _decode_predictions(
+        self, text: str, input_ids: np.ndarray, predictions: np.ndarray, offsets: np.ndarray = None
+    ) -> Tuple[List[str], List[str], Dict[str, List[str]]]:
+        """
+        Map one row of predicted label ids back to tokens, labels and entities
+        
+        Args:
+            text: Input text of the row
+            input_ids: Token ids of the row
+            predictions: Predicted label ids of the row
+            offsets: (start, end) character offsets of each token, if available
+            
+        Returns:
+            Tuple of tokens, labels (parallel lists) and entities
+        """
+        # Skip special tokens, which cover no characters of the text; rows
+        # carry no padding, so only the kept ids are converted to tokens
+        if offsets is not None:
+            keep = np.flatnonzero(offsets[:, 1] > offsets[:, 0])
+            offsets = offsets[keep]
+        else:
+            # [CLS] and [SEP] wrap the row; [UNK] tokens stay with their labels
+            keep = slice(1, len(input_ids) - 1)
+        tokens = self.tokenizer.convert_ids_to_tokens(input_ids[keep].tolist())
+        predictions = np.minimum(predictions[keep], self._outside_id)
+        
+        # One vectorized gather into the precomputed label strings
+        labels = self._id_labels[predictions].tolist()
+        return tokens, labels, self._group_entity_ids(tokens, predictions, text, offsets)
+    
+    def extract_entities_from_text(self, text: str) -> Dict[str, List[str]]:
         """
         Extract entities from text
         
@@ -142,67 +822,133 @@ class ONNXNERModel:
         Returns:
             Dictionary with entity types as keys and entity values as lists
         """
-        predictions = self.predict(text)
+        return self.analyze_batch([text])[0][2]
+    
+    def extract_entities(self, predictions: List[Tuple[str, str]]) -> Dict[str, List[str]]:
+        """
+        Group (token, label) predictions into entities, without running the model again
         
-        entities = {
-            "STREET": [],
-            "WARD": [],
-            "DISTRICT": [],
-            "PROVINCE": []
-        }
+        Args:
+            predictions: List of (token, label) tuples from predict()
+            
+        Returns:
+            Dictionary with entity types as keys and entity values as lists
+        """
+        tokens = [token for token, _ in predictions]
+        pred_ids = np.fromiter(
+            (self._label2id.get(label, self._outside_id) for _, label in predictions),
+            dtype=np.int32,
+            count=len(predictions)
+        )
+        return self._group_entity_ids(tokens, pred_ids)
+    
+    def _build_label_tables(self):
+        """
+        Precompute per-label-id lookup arrays used to decode IOB tags
+        """
+        self._entity_types = []
+        for label in self.id2label.values():
+            if label[:2] in ("B-", "I-") and label[2:] not in self._entity_types:
+                self._entity_types.append(label[2:])
         
-        current_entity = ""
-        current_type = None
+        # One extra trailing slot stands for "O", ids outside the label map are clipped to it
+        self._outside_id = max(self.id2label, default=-1) + 1
+        self._is_begin = np.zeros(self._outside_id + 1, dtype=bool)
+        self._is_inside = np.zeros(self._outside_id + 1, dtype=bool)
+        self._type_ids = np.full(self._outside_id + 1, -1, dtype=np.int8)
         
-        for token, label in predictions:
+        for label_id, label in self.id2label.items():
             if label.startswith("B-"):
-                # Save previous entity if exists
-                if current_entity and current_type:
-                    entities[current_type].append(current_entity.strip())
-                
-                # Start new entity
-                current_type = label[2:]
-                # Handle subword tokens (##)
-                if token.startswith("##"):
-                    current_entity = token[2:]  # Remove ##
-                else:
-                    current_entity = token
-                
-            elif label.startswith("I-") and current_type:
-                # Continue current entity
-                entity_type = label[2:]
-                if entity_type == current_type:
-                    # Handle subword tokens (##)
-                    if token.startswith("##"):
-                        current_entity += token[2:]  # Append without space
-                    else:
-                        current_entity += " " + token  # Append with space
+                self._is_begin[label_id] = True
+            elif label.startswith("I-"):
+                self._is_inside[label_id] = True
             else:
-                # Save current entity if exists
-                if current_entity and current_type:
-                    entities[current_type].append(current_entity.strip())
-                current_entity = ""
-                current_type = None
+                continue
+            self._type_ids[label_id] = self._entity_types.index(label[2:])
         
-        # Save last entity if exists
-        if current_entity and current_type:
-            entities[current_type].append(current_entity.strip())
+        self._label2id = {label: label_id for label_id, label in self.id2label.items()}
+        # Label string of every id, unknown ids map to "O"
+        self._id_labels = np.array(
+            [self.id2label.get(label_id, "O") for label_id in range(self._outside_id + 1)],
+            dtype=object
+        )
+    
+    def _group_entity_ids(
+        self, tokens: List[str], pred_ids: np.ndarray, text: str = None, offsets: np.ndarray = None
+    ) -> Dict[str, List[str]]:
+        """
+        Group tokens into entities from their predicted label ids
+        
+        An entity starts at a B- tag and runs until the next B- or O tag.
+        I- tags of the same type extend it, I- tags of another type are skipped.
+        
+        Args:
+            tokens: Tokens without special tokens
+            pred_ids: Predicted label id of each token
+            text: Original text, used with offsets to slice entity values
+            offsets: (start, end) character offsets of each token
+            
+        Returns:
+            Dictionary with entity types as keys and entity values as lists
+        """
+        entities = {entity_type: [] for entity_type in self._entity_types}
+        
+        starts, ends, types, member = _find_segments(
+            np.minimum(pred_ids, self._outside_id).astype(np.int32, copy=False),
+            self._is_begin,
+            self._is_inside,
+            self._type_ids
+        )
+        
+        if offsets is not None and len(starts):
+            # Character span of each entity, from the B- token to the furthest
+            # continuation, in one reduceat over (start, end) index pairs
+            bounds = np.column_stack((starts, ends)).ravel()
+            char_starts = offsets[starts, 0].tolist()
+            char_ends = np.maximum.reduceat(np.append(offsets[:, 1], 0), bounds)[::2].tolist()
+            # Entities whose span also covers skipped tokens
+            gapped = (np.add.reduceat(np.append(member, False).astype(np.int32), bounds)[::2] < ends - starts).tolist()
+        
+        # One Python pass over the detected entities only
+        for i, (start, end, type_index) in enumerate(zip(starts.tolist(), ends.tolist(), types.tolist())):
+            if offsets is not None:
+                # Slice the original text, leaving out skipped tokens
+                if gapped[i]:
+                    value = _slice_member_runs(text, offsets, member, start, end)
+                else:
+                    value = text[char_starts[i]:char_ends[i]]
+            else:
+                value = _join_tokens([tokens[j] for j in range(start, end) if member[j]])
+            if value:
+                entities[self._entity_types[type_index]].append(value.strip())
         
         return entities
 
 
 # Global model instance
 _model_instance = None
+_model_lock = threading.Lock()
 
 
 def get_model() -> ONNXNERModel:
     """
     Get or create the global model instance
     
+    Concurrent first calls (startup, lazy loading from worker threads)
+    share a single instance instead of each loading the model.
+    
     Returns:
         ONNXNERModel instance
     """
     global _model_instance
     if _model_instance is None:
-        _model_instance = ONNXNERModel()
+        with _model_lock:
+            if _model_instance is None:
+                _model_instance = ONNXNERModel()
     return _model_instance
+
+
+if __name__ == "__main__":
+    # Loading the model writes the optimized graph cache; run this once
+    # before starting several workers so none of them has to build it
+    ONNXNERModel()
@@ -0,0 +1,49 @@
+"""
+Script to quantize the ONNX model to INT8 for faster CPU inference
+"""
+from onnxruntime.quantization import quantize_dynamic, QuantType
+import os
+from . import config
+
+
+def quantize_model(model_path: str = None, output_path: str = None):
+    """
+    Quantize the MatMul/Gemm/Attention weights of the ONNX model to INT8
+    
+    Dynamic quantization keeps activations in FP32 and computes their
+    scale at runtime, so no calibration data is needed. Attention only
+    appears in graphs fused by the ORT transformer optimizer.
+    
+    Args:
+        model_path: Path to the FP32 ONNX model
+        output_path: Path to save the INT8 model
+    """
+    model_path = model_path or str(config.MODEL_FILE)
+    output_path = output_path or str(config.INT8_MODEL_FILE)
+    
+    if not os.path.exists(model_path):
+        print(f"❌ Model file not found: {model_path}")
+        print("Please run 'python -m faskapi.download_model' first.")
+        return
+    
+    print(f"Quantizing {model_path} to INT8...")
+    quantize_dynamic(
+        model_path,
+        output_path,
+        weight_type=QuantType.QInt8,
+        op_types_to_quantize=["MatMul", "Gemm", "Attention"],
+    )
+    
+    fp32_size_mb = os.path.getsize(model_path) / (1024 * 1024)
+    data_path = f"{model_path}.data"
+    if os.path.exists(data_path):
+        fp32_size_mb += os.path.getsize(data_path) / (1024 * 1024)
+    int8_size_mb = os.path.getsize(output_path) / (1024 * 1024)
+    
+    print("\n✅ Quantization completed!")
+    print(f"  - FP32: {fp32_size_mb:.2f} MB")
+    print(f"  - INT8: {int8_size_mb:.2f} MB ({output_path})")
+
+
+if __name__ == "__main__":
+    quantize_model()
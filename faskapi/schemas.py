@@ -1,43 +1,31 @@
 """
 Pydantic schemas for API request/response models
 """
-from pydantic import BaseModel, Field
-from typing import List, Dict, Tuple
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Dict, Optional, Tuple
 
 
 class NERRequest(BaseModel):
     """Request model for NER prediction"""
-    text: str = Field(..., description="Input text for NER prediction", min_length=1)
-    
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "text": "123 Đường Nguyễn Huệ, Phường Bến Nghé, Quận 1, Thành phố Hồ Chí Minh"
             }
         }
-
-
-class TokenLabel(BaseModel):
-    """Token and its label"""
-    token: str
-    label: str
+    )
+    
+    text: str = Field(..., description="Input text for NER prediction", min_length=1)
 
 
 class NERResponse(BaseModel):
     """Response model for NER prediction"""
-    text: str = Field(..., description="Original input text")
-    tokens: List[TokenLabel] = Field(..., description="List of tokens with their labels")
-    entities: Dict[str, List[str]] = Field(..., description="Extracted entities grouped by type")
-    
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "text": "123 Đường Nguyễn Huệ, Phường Bến Nghé, Quận 1, Thành phố Hồ Chí Minh",
-                "tokens": [
-                    {"token": "Đường", "label": "O"},
-                    {"token": "Nguyễn", "label": "B-STREET"},
-                    {"token": "Huệ", "label": "I-STREET"}
-                ],
+                "tokens": ["Đường", "Nguyễn", "Huệ"],
+                "labels": ["O", "B-STREET", "I-STREET"],
                 "entities": {
                     "STREET": ["Nguyễn Huệ"],
                     "WARD": ["Bến Nghé"],
@@ -46,12 +34,39 @@ class NERResponse(BaseModel):
                 }
             }
         }
+    )
+    
+    text: str = Field(..., description="Original input text")
+    tokens: List[str] = Field(..., description="Tokens of the input text")
+    labels: List[str] = Field(..., description="Label of each token, parallel to tokens")
+    entities: Dict[str, List[str]] = Field(..., description="Extracted entities grouped by type")
+
+
+class ExtractResponse(BaseModel):
+    """Response model for entity extraction"""
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "text": "456 Lê Lợi, Phường 4, Quận 3, TP.HCM",
+                "entities": {
+                    "STREET": ["Lê Lợi"],
+                    "WARD": ["Phường 4"],
+                    "DISTRICT": ["Quận 3"],
+                    "PROVINCE": ["TP.HCM"]
+                }
+            }
+        }
+    )
+    
+    text: str = Field(..., description="Original input text")
+    entities: Dict[str, List[str]] = Field(..., description="Extracted entities grouped by type")
 
 
 class HealthResponse(BaseModel):
     """Health check response"""
-    model_config = {"protected_namespaces": ()}
+    model_config = ConfigDict(protected_namespaces=())
     
     status: str
     model_loaded: bool
     message: str
+    cache_hit_rate: Optional[float] = Field(None, description="Prediction cache hit rate, once the model is loaded")
@@ -10,7 +10,7 @@ rm -f models/*.crdownload
 
 echo ""
 echo "Re-downloading all model files..."
-python faskapi/download_model.py
+python -m faskapi.download_model
 
 echo ""
 echo "Checking downloaded files..."
@@ -23,8 +23,8 @@ pip install -r requirements.txt
 
 # Download models
 echo "Downloading models..."
-python faskapi/download_model.py
+python -m faskapi.download_model
 
 # Run the API
 echo "Starting API server..."
-uvicorn faskapi.main:app --host 0.0.0.0 --port 8000 --reload
+uvicorn faskapi.main:app --host 0.0.0.0 --port 8000 --loop uvloop --http httptools --reload
@@ -45,6 +45,20 @@ def test_extract(text: str):
     print(f"Response: {json.dumps(response.json(), indent=2, ensure_ascii=False)}")
 
 
+def test_batch_predict(texts: list):
+    """Test batch predict endpoint"""
+    print(f"\n=== Testing Batch Predict Endpoint ===")
+    print(f"Input texts: {len(texts)}")
+    
+    response = requests.post(
+        f"{BASE_URL}/batch_predict",
+        json=[{"text": text} for text in texts]
+    )
+    
+    print(f"Status Code: {response.status_code}")
+    print(f"Response: {json.dumps(response.json(), indent=2, ensure_ascii=False)}")
+
+
 if __name__ == "__main__":
     # Test examples
     test_texts = [
@@ -63,3 +77,6 @@ if __name__ == "__main__":
     # Test extract
     for text in test_texts:
         test_extract(text)
+    
+    # Test batch predict
+    test_batch_predict(test_texts)